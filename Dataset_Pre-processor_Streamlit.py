@@ -1,13 +1,19 @@
 import os
 import io
+import queue
 import shutil
+import threading
+import time
 import zipfile
 import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
 
+import numpy as np
 import streamlit as st
-from PIL import Image, ImageOps, ImageEnhance
+from PIL import Image
 from rembg import remove
 from datetime import datetime
 
@@ -27,6 +33,14 @@ except:
     tk = None
     filedialog = None
 
+# Optional OpenCV for SIMD-accelerated resizes (falls back to PIL)
+try:
+    import cv2
+    HAS_CV2 = True
+except Exception:
+    cv2 = None
+    HAS_CV2 = False
+
 
 
 # =========================
@@ -67,15 +81,32 @@ footer {{ visibility: hidden; }}
 # =========================
 # FS & Helpers
 # =========================
-VALID_EXTS = {".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tiff", ".tif", ".JPG", ".JPEG", ".PNG", ".WEBP", ".BMP", ".TIFF", ".TIF"}
+VALID_EXTS = frozenset({".jpg", ".jpeg", ".png", ".webp", ".bmp", ".tiff", ".tif"})
+
+def iter_images(root: Path) -> Iterator[Path]:
+    """Lazily yield image paths under root.
+
+    An os.scandir walk costs one syscall per entry, unlike rglob("*")
+    which stats everything through pathlib — a 2-5× win on trees with
+    tens of thousands of files. Extensions are matched case-insensitively
+    against the lowercase VALID_EXTS set.
+    """
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for e in it:
+                    if e.is_dir(follow_symlinks=False):
+                        stack.append(e.path)
+                    elif os.path.splitext(e.name)[1].lower() in VALID_EXTS:
+                        yield Path(e.path)
+        except OSError:
+            continue
 
 def list_images(root: Path) -> List[Path]:
     if not root.exists():
         return []
-    try:
-        return [p for p in root.rglob("*") if p.suffix.lower() in VALID_EXTS]
-    except Exception:
-        return []
+    return list(iter_images(root))
 
 def ensure_dir(path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
@@ -96,21 +127,138 @@ def pick_directory_dialog() -> Optional[Path]:
         pass
     return None
 
-def unzip_to_temp(zf: io.BytesIO) -> Path:
+def unzip_to_temp(zf) -> Path:
+    """Extract a ZIP (path or file-like object) into a fresh temp dir
+    with bounded memory.
+
+    Members stream through a 1 MiB copy buffer instead of extractall()'s
+    read-the-whole-member approach, and independent members decompress on
+    a small thread pool (zlib releases the GIL). Entries that would
+    escape the target directory are skipped.
+    """
     tmpdir = Path(tempfile.mkdtemp(prefix="input_zip_"))
     with zipfile.ZipFile(zf) as z:
-        z.extractall(tmpdir)
+        def extract_one(info: zipfile.ZipInfo):
+            member = Path(info.filename)
+            if not info.filename or member.is_absolute() or ".." in member.parts:
+                return
+            dest = tmpdir / member
+            if info.is_dir():
+                dest.mkdir(parents=True, exist_ok=True)
+                return
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            with z.open(info) as src, open(dest, "wb") as out:
+                shutil.copyfileobj(src, out, 1 << 20)
+
+        with ThreadPoolExecutor(max_workers=4) as ex:
+            list(ex.map(extract_one, z.infolist()))
     return tmpdir
 
-def zip_dir_to_bytes(dir_path: Path) -> bytes:
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, 'w', compression=zipfile.ZIP_DEFLATED) as z:
+def zip_dir_to_file(dir_path: Path) -> Path:
+    """Stream a directory into a temp ZIP on disk.
+
+    Each member is copied through ZipFile.open() with a 1 MiB buffer, so
+    memory stays constant instead of holding the whole archive (and every
+    file) in RAM the way a BytesIO build would.
+    """
+    # JPEG/PNG/WebP are already entropy-coded — deflating them burns CPU
+    # for <1% size gain, so store those members and only deflate the rest.
+    precompressed = {".jpg", ".jpeg", ".png", ".webp"}
+    tf = tempfile.NamedTemporaryFile(delete=False, prefix="processed_zip_", suffix=".zip")
+    tf.close()
+    with zipfile.ZipFile(tf.name, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as z:
         for p in dir_path.rglob("*"):
             if p.is_file():
-                z.write(p, arcname=str(p.relative_to(dir_path)))
-    buf.seek(0)
-    return buf.read()
+                info = zipfile.ZipInfo.from_file(p, arcname=str(p.relative_to(dir_path)))
+                info.compress_type = (zipfile.ZIP_STORED if p.suffix.lower() in precompressed
+                                      else zipfile.ZIP_DEFLATED)
+                with z.open(info, "w", force_zip64=True) as zo, open(p, "rb") as src:
+                    shutil.copyfileobj(src, zo, 1 << 20)
+    return Path(tf.name)
+
+# Fastest first; only the ones onnxruntime actually ships get used.
+PREFERRED_PROVIDERS = (
+    "CUDAExecutionProvider",       # NVIDIA GPU
+    "DmlExecutionProvider",        # DirectML (Windows GPU)
+    "OpenVINOExecutionProvider",   # Intel CPU/iGPU
+    "CPUExecutionProvider",
+)
+
+def _quantized_inference_session(session, sess_opts, providers):
+    """InferenceSession over an INT8 copy of the session's model.
 
+    Dynamic quantization halves weight bandwidth and lets ORT use int8
+    GEMM kernels (VNNI) on CPU — roughly 2× faster inference for a barely
+    visible mask-quality cost. The quantized file is written next to the
+    original in ~/.u2net the first time and reused afterwards.
+    """
+    import onnxruntime as ort
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    src = Path(session.__class__.download_models())
+    dst = src.with_name(src.stem + "_quant.onnx")
+    if not dst.exists():
+        quantize_dynamic(str(src), str(dst), weight_type=QuantType.QUInt8,
+                         per_channel=False, op_types_to_quantize=["Conv", "MatMul"])
+    return ort.InferenceSession(str(dst), sess_options=sess_opts,
+                                providers=providers or ort.get_available_providers())
+
+@st.cache_resource(show_spinner="Loading background-removal model…")
+def get_rembg_session(model_name: str = "u2net", quantize: bool = False):
+    """One rembg session per model, shared across reruns.
+
+    rembg.remove() without a session re-initializes the U2Net ONNX session
+    (graph load + provider init) on every single image — by far the
+    dominant per-file cost. Caching it pays that once per model.
+
+    The session is built with the best available execution provider (GPU
+    when present) and full graph optimizations instead of rembg's default
+    CPU session.
+    """
+    import onnxruntime as ort
+    from rembg import new_session
+
+    providers = [p for p in PREFERRED_PROVIDERS if p in ort.get_available_providers()]
+
+    sess_opts = ort.SessionOptions()
+    sess_opts.intra_op_num_threads = os.cpu_count() or 1
+    sess_opts.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+    sess_opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+    try:
+        # new_session() builds its own default SessionOptions, so construct
+        # the session class directly to control them.
+        from rembg.sessions import sessions_class
+        session_class = next(sc for sc in sessions_class if sc.name() == model_name)
+        session = session_class(model_name, sess_opts, providers)
+    except Exception:
+        session = new_session(model_name, providers=providers)
+
+    if quantize:
+        try:
+            session.inner_session = _quantized_inference_session(session, sess_opts, providers)
+        except Exception:
+            st.warning("INT8 quantization unavailable — using the full-precision model.")
+
+    return session
+
+@st.cache_data(show_spinner=False)
+def make_thumb(path_str: str, mtime: float) -> bytes:
+    """256-px PNG thumbnail for the preview tab, cached on (path, mtime).
+
+    Streamlit reruns the whole script on every widget change; without the
+    cache each rerun re-decodes up to 8 full-resolution images and
+    re-encodes them for the browser.
+    """
+    with Image.open(path_str) as im:
+        im.thumbnail((256, 256))
+        if im.mode not in ("RGB", "RGBA", "L"):
+            im = im.convert("RGBA")
+        buf = io.BytesIO()
+        im.save(buf, "PNG")
+    return buf.getvalue()
+
+@lru_cache(maxsize=64)
 def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
     h = hex_color.strip().lstrip("#")
     if len(h) == 3:
@@ -124,94 +272,232 @@ def hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
 # =========================
 # Image Ops
 # =========================
+def _resize_lanczos(img: Image.Image, size: Tuple[int, int]) -> Image.Image:
+    """High-quality resize: OpenCV's SIMD kernels when available, PIL otherwise.
+
+    cv2 is 4-6× faster than stock Pillow's scalar Lanczos loop; INTER_AREA
+    is used when purely shrinking (faster, no ringing). Installing
+    pillow-simd speeds up the PIL fallback with no code change.
+    """
+    if not HAS_CV2:
+        return img.resize(size, Image.LANCZOS)
+    arr = np.asarray(img)
+    interp = cv2.INTER_AREA if (size[0] < img.width and size[1] < img.height) else cv2.INTER_LANCZOS4
+    return Image.fromarray(cv2.resize(arr, size, interpolation=interp))
+
+
+def _flatten_rgba_to_rgb(img: Image.Image, bg_rgb: Tuple[int, int, int]) -> Image.Image:
+    """Composite an RGBA image onto an opaque background color.
+
+    One vectorized NumPy pass instead of allocating a full background
+    image and alpha-compositing through PIL.
+    """
+    if img.mode != "RGBA":
+        img = img.convert("RGBA")
+    arr = np.asarray(img, dtype=np.float32)
+    a = arr[..., 3:4] * (1.0 / 255.0)
+    rgb = arr[..., :3] * a + np.asarray(bg_rgb, dtype=np.float32) * (1.0 - a)
+    return Image.fromarray((rgb + 0.5).astype(np.uint8), "RGB")
+
+
 def remove_bg_and_square(img: Image.Image, *,
                          bg_mode: str,
                          bg_rgba: Tuple[int, int, int, int],
                          pad: int,
                          square: bool,
                          square_size: Optional[int],
-                         no_upscale: bool) -> Image.Image:
+                         no_upscale: bool,
+                         brightness: float = 1.0,
+                         session=None) -> Image.Image:
     """
     bg_mode: 'transparent' | 'white' | 'custom'
     """
     if img.mode != "RGBA":
         img = img.convert("RGBA")
-    out = remove(img)
-
-    if pad > 0:
-        out = ImageOps.expand(out, border=pad, fill=(0, 0, 0, 0))
+    out = remove(img, session=session)
+    return _finish_cutout(out, bg_mode=bg_mode, bg_rgba=bg_rgba, pad=pad,
+                          square=square, square_size=square_size, no_upscale=no_upscale,
+                          brightness=brightness)
+
+
+def _finish_cutout(out: Image.Image, *,
+                   bg_mode: str,
+                   bg_rgba: Tuple[int, int, int, int],
+                   pad: int,
+                   square: bool,
+                   square_size: Optional[int],
+                   no_upscale: bool,
+                   brightness: float = 1.0) -> Image.Image:
+    """Everything after background removal: pad, square canvas, composite,
+    optional brightness.
+
+    The pad/square geometry is computed up front so the cutout lands in a
+    single pre-sized canvas, and composite + brightness share one NumPy
+    sweep — instead of materializing a new PIL image per step.
+    """
+    if out.mode != "RGBA":
+        out = out.convert("RGBA")
+
+    # Final canvas geometry: padding enlarges the frame, square extends the
+    # shorter side (or scales to fit a requested size). The content is
+    # always centered, so padding folds into the placement offset.
+    w, h = out.size
+    pw, ph = w + 2 * pad, h + 2 * pad
+    if square and square_size and square_size > 0:
+        target = int(square_size)
+        scale = min(target / pw, target / ph)
+        if scale < 1 or (scale > 1 and not no_upscale):
+            new_w = max(1, int(round(w * scale)))
+            new_h = max(1, int(round(h * scale)))
+            if (new_w, new_h) != (w, h):
+                out = _resize_lanczos(out, (new_w, new_h))
+                w, h = out.size
+        cw = ch = target
+    elif square:
+        cw = ch = max(pw, ph)
+    else:
+        cw, ch = pw, ph
+
+    opaque_bg = bg_mode == "white" or (bg_mode == "custom" and bg_rgba[3] == 255)
+    if (cw, ch) == (w, h) and not opaque_bg and brightness == 1.0 and bg_mode != "custom":
+        return out
+
+    arr = np.asarray(out, dtype=np.uint8)
+    if (cw, ch) != (w, h):
+        canvas = np.zeros((ch, cw, 4), dtype=np.uint8)
+        ox, oy = (cw - w) // 2, (ch - h) // 2
+        canvas[oy:oy + h, ox:ox + w] = arr
+        arr = canvas
+
+    if opaque_bg:
+        bg_rgb = (255, 255, 255) if bg_mode == "white" else bg_rgba[:3]
+        a = arr[..., 3:4].astype(np.float32) * (1.0 / 255.0)
+        rgb = arr[..., :3].astype(np.float32) * a + np.asarray(bg_rgb, dtype=np.float32) * (1.0 - a)
+        if brightness != 1.0:
+            rgb *= brightness
+        return Image.fromarray(np.clip(rgb + 0.5, 0, 255).astype(np.uint8), "RGB")
+
+    if bg_mode == "custom":  # translucent custom background
+        bg = Image.new("RGBA", (arr.shape[1], arr.shape[0]), bg_rgba)
+        bg.alpha_composite(Image.fromarray(arr, "RGBA"))
+        arr = np.asarray(bg)
+
+    if brightness != 1.0:
+        if not arr.flags.writeable:
+            arr = arr.copy()
+        arr[..., :3] = np.clip(arr[..., :3].astype(np.float32) * brightness + 0.5,
+                               0, 255).astype(np.uint8)
+
+    return Image.fromarray(arr, "RGBA")
+
+
+# How many images share one ONNX run in the batched background-removal path.
+BG_BATCH = 8
+
+# Models whose preprocessing we can mirror for batched inference
+# (U2Net family: 320×320 input, ImageNet-style normalization).
+BATCH_INPUT_SIZE = {
+    "u2net": (320, 320),
+    "u2netp": (320, 320),
+    "u2net_human_seg": (320, 320),
+    "silueta": (320, 320),
+}
 
-    if square:
-        w, h = out.size
-        if square_size and square_size > 0:
-            target = int(square_size)
-            scale = min(target / w, target / h)
-            if scale < 1 or (scale > 1 and not no_upscale):
-                use_scale = scale if (scale < 1 or not no_upscale) else 1.0
-                new_w = max(1, int(round(w * use_scale)))
-                new_h = max(1, int(round(h * use_scale)))
-                if (new_w, new_h) != (w, h):
-                    out = out.resize((new_w, new_h), Image.LANCZOS)
-                    w, h = out.size
-            canvas = Image.new("RGBA", (target, target), (0, 0, 0, 0))
-            canvas.paste(out, ((target - w) // 2, (target - h) // 2), out)
-            out = canvas
-        else:
-            side = max(w, h)
-            canvas = Image.new("RGBA", (side, side), (0, 0, 0, 0))
-            canvas.paste(out, ((side - w) // 2, (side - h) // 2), out)
-            out = canvas
+def _u2net_preprocess(img: Image.Image, size: Tuple[int, int]) -> np.ndarray:
+    """rembg's U2Net normalization for one image, minus the batch dim."""
+    im = _resize_lanczos(img.convert("RGB"), size)
+    ary = np.asarray(im, dtype=np.float32)
+    ary = ary / max(float(ary.max()), 1e-6)
+    ary = (ary - (0.485, 0.456, 0.406)) / (0.229, 0.224, 0.225)
+    return ary.transpose((2, 0, 1)).astype(np.float32)
+
+def remove_bg_batch(imgs: List[Image.Image], session) -> Optional[List[Image.Image]]:
+    """Segment several images with a single ONNX run.
+
+    Stacking the inputs into one (K,3,320,320) tensor amortizes kernel
+    launches and gives ORT bigger GEMM tiles than K separate runs.
+    Returns None when the session's model isn't one we know how to batch;
+    raises if the model rejects a batch dim (callers fall back per-image).
+    """
+    size = BATCH_INPUT_SIZE.get(getattr(session, "model_name", ""))
+    if size is None or not hasattr(session, "inner_session"):
+        return None
 
-    # Composite onto chosen background
-    if bg_mode == "white":
-        bg = Image.new("RGBA", out.size, (255, 255, 255, 255))
-        bg.alpha_composite(out)
-        out = bg.convert("RGB")
-    elif bg_mode == "custom":
-        bg = Image.new("RGBA", out.size, bg_rgba)
-        bg.alpha_composite(out)
-        out = bg.convert("RGB") if bg_rgba[3] == 255 else bg
+    inner = session.inner_session
+    input_name = inner.get_inputs()[0].name
+    batch = np.stack([_u2net_preprocess(im, size) for im in imgs])
+    preds = inner.run(None, {input_name: batch})[0][:, 0, :, :]
 
-    return out
+    cutouts = []
+    for img, pred in zip(imgs, preds):
+        mi, ma = float(pred.min()), float(pred.max())
+        pred = (pred - mi) / (ma - mi) if ma > mi else np.zeros_like(pred)
+        mask = _resize_lanczos(Image.fromarray((pred * 255).astype(np.uint8), mode="L"), img.size)
+        empty = Image.new("RGBA", img.size, 0)
+        cutouts.append(Image.composite(img.convert("RGBA"), empty, mask))
+    return cutouts
 
 
 def apply_brightness(img: Image.Image, factor: float) -> Image.Image:
     if factor == 1.0:
         return img
-    return ImageEnhance.Brightness(img).enhance(factor)
+    # 8-bit brightness is just y = clip(x * factor), so a 256-entry LUT via
+    # Image.point does it in one C pass — ImageEnhance.Brightness allocates
+    # a full black image and blends, sweeping the pixels twice.
+    lut = np.clip(np.arange(256) * factor + 0.5, 0, 255).astype(np.uint8).tolist()
+    bands = img.getbands()
+    if bands[-1] == "A":
+        table = lut * (len(bands) - 1) + list(range(256))  # leave alpha alone
+    else:
+        table = lut * len(bands)
+    return img.point(table)
+
+
+@lru_cache(maxsize=16)
+def _canvas_template(size: Tuple[int, int], bg_mode: str,
+                     bg_rgba: Tuple[int, int, int, int]) -> Image.Image:
+    """Pre-filled background canvas, shared per (size, background).
+
+    Every image in a run targets the same canvas, so filling it once and
+    handing out .copy()s (a plain memcpy) beats allocating and flood-
+    filling a fresh Image.new per image. Callers must copy before drawing.
+    """
+    if bg_mode == "transparent":
+        return Image.new("RGBA", size, (0, 0, 0, 0))
+    if bg_mode == "white":
+        return Image.new("RGB", size, (255, 255, 255))
+    if bg_rgba[3] == 255:
+        return Image.new("RGB", size, bg_rgba[:3])
+    return Image.new("RGBA", size, bg_rgba)
 
 
 def resize_image(img: Image.Image, enable: bool, w: int, h: int,
                  mode: str, bg_mode: str, bg_rgba: Tuple[int, int, int, int]) -> Image.Image:
     if not enable or w <= 0 or h <= 0:
         return img
+    if img.size == (w, h):
+        return img  # already the target size — skip the Lanczos pass entirely
     if mode == "stretch":
-        return img.resize((w, h), Image.LANCZOS)
-
-    if img.mode != "RGBA":
-        img = img.convert("RGBA")
+        return _resize_lanczos(img, (w, h))
 
+    # No RGBA upgrade here: an opaque source needs no mask to paste and no
+    # flattening after a crop, so converting would only add a full-image
+    # pass and +33% memory.
     src_w, src_h = img.size
     src_ratio, dst_ratio = src_w / src_h, w / h
 
-    def make_canvas(size):
-        if bg_mode == "transparent":
-            return Image.new("RGBA", size, (0, 0, 0, 0))
-        if bg_mode == "white":
-            return Image.new("RGB", size, (255, 255, 255))
-        if bg_rgba[3] == 255:
-            return Image.new("RGB", size, bg_rgba[:3])
-        return Image.new("RGBA", size, bg_rgba)
-
     if mode == "keep_aspect_pad":
         if src_ratio > dst_ratio:
             new_w, new_h = w, int(round(w / src_ratio))
         else:
             new_h, new_w = h, int(round(h * src_ratio))
-        resized = img.resize((new_w, new_h), Image.LANCZOS)
-        canvas = make_canvas((w, h))
+        resized = img if (new_w, new_h) == (src_w, src_h) else _resize_lanczos(img, (new_w, new_h))
+        canvas = _canvas_template((w, h), bg_mode, bg_rgba).copy()
         ox, oy = (w - new_w) // 2, (h - new_h) // 2
-        canvas.paste(resized, (ox, oy), resized)
+        if "A" in resized.getbands():
+            canvas.paste(resized, (ox, oy), resized)
+        else:
+            canvas.paste(resized, (ox, oy))
         return canvas
 
     if mode == "keep_aspect_crop":
@@ -219,11 +505,15 @@ def resize_image(img: Image.Image, enable: bool, w: int, h: int,
             new_w, new_h = w, int(round(w / src_ratio))
         else:
             new_h, new_w = h, int(round(h * src_ratio))
-        resized = img.resize((new_w, new_h), Image.LANCZOS)
+        resized = img if (new_w, new_h) == (src_w, src_h) else _resize_lanczos(img, (new_w, new_h))
         left, top = (new_w - w) // 2, (new_h - h) // 2
         cropped = resized.crop((left, top, left + w, top + h))
-        if bg_mode == "white" or (bg_mode == "custom" and bg_rgba[3] == 255):
-            return cropped.convert("RGB")
+        if "A" not in cropped.getbands():
+            return cropped
+        if bg_mode == "white":
+            return _flatten_rgba_to_rgb(cropped, (255, 255, 255))
+        if bg_mode == "custom" and bg_rgba[3] == 255:
+            return _flatten_rgba_to_rgb(cropped, bg_rgba[:3])
         return cropped
 
     return img
@@ -253,34 +543,95 @@ def process_one(in_path: Path, in_root: Path, out_root: Path, *,
                 enable_resize: bool,
                 target_w: int,
                 target_h: int,
-                resize_mode: str) -> Tuple[Path, Path, bool, str]:
+                resize_mode: str,
+                session=None,
+                cutout: Optional[Image.Image] = None,
+                base_img: Optional[Image.Image] = None,
+                save_fn=save_image) -> Tuple[Path, Path, bool, str]:
     try:
         rel = in_path.relative_to(in_root)
         out_path = (out_root / rel).with_suffix(rel.suffix)
 
-        with Image.open(in_path) as im:
-            base = im.convert("RGBA") if im.mode not in ("RGB", "RGBA") else im
-
-            if operation == "bg_only":
-                out = remove_bg_and_square(base, bg_mode=bg_mode, bg_rgba=bg_rgba,
-                                           pad=pad, square=square, square_size=square_size, no_upscale=no_upscale)
-            elif operation == "resize_only":
-                out = resize_image(base, True, target_w, target_h, resize_mode, bg_mode, bg_rgba)
-            elif operation == "brightness_only":
-                out = apply_brightness(base, brightness)
-            else:  # do_all
-                out = remove_bg_and_square(base, bg_mode=bg_mode, bg_rgba=bg_rgba,
-                                           pad=pad, square=square, square_size=square_size, no_upscale=no_upscale)
-                out = apply_brightness(out, brightness)
+        if cutout is not None and operation in ("bg_only", "do_all"):
+            # Background removal already happened (batched path) — finish only.
+            out = _finish_cutout(cutout, bg_mode=bg_mode, bg_rgba=bg_rgba,
+                                 pad=pad, square=square, square_size=square_size, no_upscale=no_upscale,
+                                 brightness=(brightness if operation == "do_all" else 1.0))
+            if operation == "do_all":
                 if enable_resize:
                     out = resize_image(out, True, target_w, target_h, resize_mode, bg_mode, bg_rgba)
+            save_fn(out, out_path)
+            return in_path, out_path, True, ""
 
-        save_image(out, out_path)
+        def _apply(base: Image.Image) -> Image.Image:
+            if operation == "bg_only":
+                return remove_bg_and_square(base, bg_mode=bg_mode, bg_rgba=bg_rgba,
+                                            pad=pad, square=square, square_size=square_size, no_upscale=no_upscale,
+                                            session=session)
+            if operation == "resize_only":
+                return resize_image(base, True, target_w, target_h, resize_mode, bg_mode, bg_rgba)
+            if operation == "brightness_only":
+                return apply_brightness(base, brightness)
+            # do_all
+            out = remove_bg_and_square(base, bg_mode=bg_mode, bg_rgba=bg_rgba,
+                                       pad=pad, square=square, square_size=square_size, no_upscale=no_upscale,
+                                       brightness=brightness, session=session)
+            if enable_resize:
+                out = resize_image(out, True, target_w, target_h, resize_mode, bg_mode, bg_rgba)
+            return out
+
+        if base_img is not None:
+            # Already decoded upstream (batched-path fallback) — don't hit the disk again.
+            out = _apply(base_img)
+        else:
+            with Image.open(in_path) as im:
+                # libjpeg can decode at 1/2, 1/4 or 1/8 scale almost for free;
+                # when the image is headed for a resize anyway, ask for ≥2× the
+                # target so the final Lanczos pass loses no quality.
+                wants_resize = (operation == "resize_only") or (operation == "do_all" and enable_resize)
+                if (wants_resize and target_w > 0 and target_h > 0
+                        and in_path.suffix.lower() in {".jpg", ".jpeg"}):
+                    im.draft("RGB", (target_w * 2, target_h * 2))
+                if operation in ("bg_only", "do_all") or im.mode in ("RGB", "RGBA"):
+                    base = im.convert("RGBA") if im.mode not in ("RGB", "RGBA") else im
+                elif im.mode == "L":
+                    base = im  # resize/brightness handle grayscale natively — no 4× channel expand
+                else:
+                    base = im.convert("RGBA")
+
+                out = _apply(base)
+                if out is base:
+                    # No-op paths (already-target-size resize, brightness 1.0)
+                    # hand back the lazy source image — decode it before the
+                    # file closes or the async save would hit a closed image.
+                    out.load()
+
+        save_fn(out, out_path)
         return in_path, out_path, True, ""
     except Exception as e:
         return in_path, Path(), False, str(e)
 
 
+def _decode_chunks(images: List[Path], out_q: "queue.Queue") -> None:
+    """Producer side of the batched pipeline: decode BG_BATCH-sized chunks
+    ahead of inference into a bounded queue, then signal the end with None.
+
+    Decoding the next chunk overlaps with the current chunk's ONNX run on
+    the consumer side, hiding disk + decode latency behind inference.
+    """
+    for i in range(0, len(images), BG_BATCH):
+        decoded: List[Tuple[Path, Image.Image]] = []
+        bad: List[Tuple[Path, str]] = []
+        for p in images[i:i + BG_BATCH]:
+            try:
+                with Image.open(p) as im:
+                    decoded.append((p, im.convert("RGBA")))
+            except Exception as e:
+                bad.append((p, str(e)))
+        out_q.put((decoded, bad))
+    out_q.put(None)
+
+
 # =========================
 # App
 # =========================
@@ -343,6 +694,20 @@ with st.sidebar:
     }
     operation_key = op_map[operation]
 
+    bg_model = "u2net"
+    fast_int8 = False
+    if operation_key in ("bg_only", "do_all"):
+        bg_model = st.selectbox(
+            "Background model",
+            ["u2net", "u2netp", "isnet-general-use"],
+            help="u2netp is ~4× smaller/faster, u2net is the default quality.",
+        )
+        fast_int8 = st.checkbox(
+            "Fast (INT8) model",
+            value=False,
+            help="Quantize the model weights to INT8 once — ~2× faster on CPU, slightly softer masks.",
+        )
+
     st.subheader("📥 Input")
     input_method = st.radio(
         "Pick source",
@@ -383,19 +748,27 @@ with st.sidebar:
     
                 try:
                     st.write("Downloading from Google Drive...")
-                    response = requests.get(download_url)
-                    if response.status_code == 200:
-                        tmpdir = Path(tempfile.mkdtemp(prefix="input_drive_"))
+                    # Stream straight to disk — holding the whole archive in
+                    # a bytes object (and again in BytesIO) doubles peak
+                    # memory and blocks until the download finishes.
+                    tmp_zip = Path(tempfile.mkdtemp(prefix="input_drive_")) / "download.zip"
+                    with requests.get(download_url, stream=True) as response:
+                        if response.status_code == 200:
+                            with open(tmp_zip, "wb") as f:
+                                shutil.copyfileobj(response.raw, f, 1 << 20)
+                        else:
+                            st.error("Failed to download file from Google Drive. Check permissions.")
+                            tmp_zip = None
+                    if tmp_zip is not None:
                         # Try unzip if it's a ZIP
                         try:
-                            with zipfile.ZipFile(io.BytesIO(response.content)) as z:
-                                z.extractall(tmpdir)
-                                st.success(f"Dataset downloaded and extracted to: {tmpdir}")
-                                st.session_state["chosen_input_dir"] = str(tmpdir)
+                            tmpdir = unzip_to_temp(tmp_zip)
+                            st.success(f"Dataset downloaded and extracted to: {tmpdir}")
+                            st.session_state["chosen_input_dir"] = str(tmpdir)
                         except zipfile.BadZipFile:
                             st.error("This Google Drive file is not a ZIP. Please upload or link a ZIP dataset.")
-                    else:
-                        st.error("Failed to download file from Google Drive. Check permissions.")
+                        finally:
+                            tmp_zip.unlink(missing_ok=True)
                 except Exception as e:
                     st.error(f"Download error: {e}")
 
@@ -547,8 +920,8 @@ with tabs[0]:
             cols = st.columns(min(4, len(imgs[:8])))
             for i, p in enumerate(imgs[:8]):
                 try:
-                    with Image.open(p) as im:
-                        cols[i % len(cols)].image(im, caption=str(p.relative_to(input_dir)), use_container_width=True)
+                    thumb = make_thumb(str(p), p.stat().st_mtime)
+                    cols[i % len(cols)].image(thumb, caption=str(p.relative_to(input_dir)), use_container_width=True)
                 except Exception:
                     cols[i % len(cols)].warning(f"Preview failed: {p.name}")
     else:
@@ -602,35 +975,134 @@ if go:
     successes, failures = 0, []
     run_log.write("Starting…")
 
-    for idx, img_path in enumerate(images, start=1):
-        _, outp, ok, err = process_one(
-            img_path, in_root, out_root,
-            operation=op_map[operation],
-            bg_mode=bg_mode,
-            bg_rgba=bg_rgba,
-            pad=pad,
-            square=square if (operation_key in ("bg_only","do_all")) else False,
-            square_size=(int(square_size) if ((operation_key in ("bg_only","do_all")) and square and square_size > 0) else None),
-            no_upscale=(no_upscale if ((operation_key in ("bg_only","do_all")) and square) else True),
-            brightness=(brightness if (operation_key in ("brightness_only","do_all")) else 1.0),
-            enable_resize=(enable_resize if (operation_key in ("resize_only","do_all")) else False),
-            target_w=(target_w if (operation_key in ("resize_only","do_all")) else 0),
-            target_h=(target_h if (operation_key in ("resize_only","do_all")) else 0),
-            resize_mode=(resize_mode if (operation_key in ("resize_only","do_all")) else "keep_aspect_pad"),
-        )
+    # Each image is independent, so fan the work out over a thread pool.
+    # ONNX Runtime releases the GIL during inference and PIL does the same
+    # for decode/encode, so threads give near-linear scaling without the
+    # per-process model reload a process pool would cost us.
+    # Encoding + disk writes overlap with the next image's work on a small
+    # writer pool; failures are collected and folded in after the drain.
+    # The semaphore caps how many full-resolution results can sit queued
+    # for the writers — without it, cheap ops on a slow disk pile every
+    # image into RAM.
+    writer_pool = ThreadPoolExecutor(max_workers=4)
+    save_slots = threading.Semaphore(16)
+    save_errors: List[Tuple[Path, str]] = []
+
+    def _async_save(out_img: Image.Image, out_path: Path):
+        save_slots.acquire()
+
+        def _write():
+            try:
+                save_image(out_img, out_path)
+            except Exception as e:
+                save_errors.append((out_path, str(e)))
+            finally:
+                save_slots.release()
+        writer_pool.submit(_write)
+
+    session = get_rembg_session(bg_model, quantize=fast_int8) if operation_key in ("bg_only","do_all") else None
+    run_opts = dict(
+        operation=op_map[operation],
+        bg_mode=bg_mode,
+        bg_rgba=bg_rgba,
+        pad=pad,
+        square=square if (operation_key in ("bg_only","do_all")) else False,
+        square_size=(int(square_size) if ((operation_key in ("bg_only","do_all")) and square and square_size > 0) else None),
+        no_upscale=(no_upscale if ((operation_key in ("bg_only","do_all")) and square) else True),
+        brightness=(brightness if (operation_key in ("brightness_only","do_all")) else 1.0),
+        enable_resize=(enable_resize if (operation_key in ("resize_only","do_all")) else False),
+        target_w=(target_w if (operation_key in ("resize_only","do_all")) else 0),
+        target_h=(target_h if (operation_key in ("resize_only","do_all")) else 0),
+        resize_mode=(resize_mode if (operation_key in ("resize_only","do_all")) else "keep_aspect_pad"),
+        session=session,
+        save_fn=_async_save,
+    )
+
+    # Background removal goes through the batched pipeline when the model
+    # is one we can stack into a single ONNX run; everything else is one
+    # image per task.
+    batchable = operation_key in ("bg_only","do_all") and getattr(session, "model_name", "") in BATCH_INPUT_SIZE
+
+    # Throttled to ~5 updates/s — each one is a websocket round-trip.
+    stats = {"done": 0, "next_tick": time.monotonic()}
+
+    def _record(img_path: Path, outp: Path, ok: bool, err: str):
+        stats["done"] += 1
         if ok:
-            successes += 1
             if first_pair["src"] is None and first_pair["dst"] is None:
-                dst_guess = outp if outp.exists() else (outp.with_suffix(".png"))
                 first_pair["src"] = str(img_path)
-                first_pair["dst"] = str(dst_guess)
+                first_pair["dst"] = str(outp)
         else:
             failures.append((img_path, err))
             with tabs[2]:
                 err_box.error(f"{img_path.name}: {err}")
 
-        progress.progress(idx / len(images))
-        run_log.write(f"Processed {idx}/{len(images)}")
+        now = time.monotonic()
+        if now >= stats["next_tick"] or stats["done"] == len(images):
+            progress.progress(stats["done"] / len(images))
+            run_log.write(f"Processed {stats['done']}/{len(images)}")
+            stats["next_tick"] = now + 0.2
+
+    max_workers = min(len(images), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max_workers) as ex:
+        worker = partial(process_one, in_root=in_root, out_root=out_root, **run_opts)
+        if batchable:
+            # Producer/consumer pipeline: a decoder thread keeps up to 4
+            # chunks decoded ahead, the main thread runs batched inference
+            # (ORT's intra-op threads use the cores), and finishing/saving
+            # fans out over the pool.
+            prefetch_q: "queue.Queue" = queue.Queue(maxsize=4)
+            threading.Thread(target=_decode_chunks, args=(images, prefetch_q), daemon=True).start()
+
+            pending = []
+            batch_ok = True  # latched off after the first rejected batch
+            while (item := prefetch_q.get()) is not None:
+                decoded, bad = item
+                for p, msg in bad:
+                    _record(p, Path(), False, msg)
+                if decoded:
+                    cutouts = None
+                    if batch_ok:
+                        try:
+                            cutouts = remove_bg_batch([im for _, im in decoded], session)
+                        except Exception:
+                            cutouts = None
+                        if cutouts is None:
+                            # Model won't take a batch dim — stop paying the
+                            # preprocess + doomed run on every later chunk.
+                            batch_ok = False
+                    if cutouts is None:
+                        pending += [ex.submit(worker, p, base_img=im)
+                                    for p, im in decoded]
+                    else:
+                        pending += [ex.submit(worker, p, cutout=cut)
+                                    for (p, _), cut in zip(decoded, cutouts)]
+                # Surface already-finished images while later chunks infer.
+                still_running = []
+                for f in pending:
+                    if f.done():
+                        _record(*f.result())
+                    else:
+                        still_running.append(f)
+                pending = still_running
+            for f in as_completed(pending):
+                _record(*f.result())
+        else:
+            for fut in as_completed([ex.submit(worker, p) for p in images]):
+                _record(*fut.result())
+
+    writer_pool.shutdown(wait=True)
+    for p, msg in save_errors:
+        failures.append((p, msg))
+        with tabs[2]:
+            err_box.error(f"{p.name}: {msg}")
+
+    # save_image may shift the suffix (e.g. RGBA forced to .png); resolve
+    # the preview path now that every write has landed.
+    if first_pair["dst"] and not Path(first_pair["dst"]).exists():
+        first_pair["dst"] = str(Path(first_pair["dst"]).with_suffix(".png"))
+
+    successes = len(images) - len(failures)
 
     st.success(f"Finished ✓ {successes} succeeded, {len(failures)} failed.")
 
@@ -658,10 +1130,14 @@ if go:
 
     # ZIP download if needed
     if out_mode == "zip":
-        zip_bytes = zip_dir_to_bytes(out_root)
-        st.download_button("⬇️ Download processed dataset (ZIP)",
-                           data=zip_bytes, file_name="processed_dataset.zip",
-                           mime="application/zip", use_container_width=True)
+        zip_path = zip_dir_to_file(out_root)
+        with open(zip_path, "rb") as zf_handle:
+            st.download_button("⬇️ Download processed dataset (ZIP)",
+                               data=zf_handle, file_name="processed_dataset.zip",
+                               mime="application/zip", use_container_width=True)
+        # download_button consumed the handle above — the temp archive on
+        # disk would otherwise outlive the run.
+        zip_path.unlink(missing_ok=True)
 
     for d in cleanup_dirs:
         shutil.rmtree(d, ignore_errors=True)